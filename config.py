@@ -18,3 +18,6 @@ PAD_SEC: float = 1.2
 # CHANGED_RATIO_THRESHOLD: 「変化画素 / 全画素」がこの割合を超えたフレームを動きありと判定
 PIXEL_DIFF_THRESHOLD: int = 25
 CHANGED_RATIO_THRESHOLD: float = 0.005
+
+# 動きの検出結果を <入力動画のディレクトリ>/output/cache にキャッシュするか
+USE_MOTION_MASK_CACHE: bool = True
@@ -1,12 +1,18 @@
 import logging
 from pathlib import Path
-from typing import List
+from typing import List, Optional
 
-from moviepy import VideoClip, VideoFileClip, concatenate_videoclips, vfx
+import numpy as np
 
 import config
 from src.model import Config, Segment, VideoMetaData
-from src.service import FrameDiffService, SegmentService, VideoService
+from src.service import (
+    FrameDiffService,
+    MotionMaskCacheService,
+    SegmentService,
+    VideoConcatService,
+    VideoService,
+)
 
 # from src.service import HandDetectorService
 
@@ -21,19 +27,25 @@ class EditMovie:
     input_movie_path: str
     output_movie_path: str
     config: Config
+    decoder_threads: Optional[int]
+    show_progress: bool
 
-    source_clip: VideoFileClip
     duration: float
     video_meta: VideoMetaData
 
-    # hand_mask: List[bool]  # Step2 ポーズ検出で再利用予定
-    active_mask: List[bool]
+    # hand_mask: np.ndarray  # Step2 ポーズ検出で再利用予定
+    active_mask: np.ndarray
     segments: List[Segment]
 
-    output_movie: VideoClip
-
-    def __init__(self, input_movie_path: str) -> None:
+    def __init__(
+        self,
+        input_movie_path: str,
+        decoder_threads: Optional[int] = None,
+        show_progress: bool = True,
+    ) -> None:
         self.input_movie_path = input_movie_path
+        self.decoder_threads = decoder_threads
+        self.show_progress = show_progress
         input_path = Path(input_movie_path)
         output_filename = f"{input_path.stem}{input_path.suffix}"
         output_dir = input_path.parent / "output" / "movie"
@@ -50,16 +62,12 @@ class EditMovie:
             movie_speed=config.MOVIE_SPEED,
         )
 
-    def _setup(self) -> None:
-        self.source_clip = VideoFileClip(self.input_movie_path)
-        self.duration = self.source_clip.duration
-
     def _detect_active(self) -> None:
 
         # TODO: 安定したら手のフレーム検出処理を削除
         # logger.info("手のフレームを検出")
         # hand_video_meta = VideoService.get_video_meta(
-        #     self.input_movie_path, self.config.fps_sample
+        #     self.input_movie_path, self.config.fps_sample, self.decoder_threads
         # )
         # self.video_meta = hand_video_meta
         # hand_detector = HandDetectorService(config=self.config, video_meta=hand_video_meta)
@@ -67,14 +75,39 @@ class EditMovie:
 
         logger.info("動きフレームを検出")
         motion_video_meta = VideoService.get_video_meta(
-            self.input_movie_path, self.config.fps_sample
+            self.input_movie_path, self.config.fps_sample, self.decoder_threads
         )
         self.video_meta = motion_video_meta
-        self.active_mask = FrameDiffService.extract_mask(motion_video_meta)
 
-        # self.active_mask = [h or m for h, m in zip(self.hand_mask, self.active_mask)]
-
-    def _make_segment(self, mask: List[bool]) -> None:
+        if not config.USE_MOTION_MASK_CACHE:
+            self.active_mask = FrameDiffService.extract_mask(
+                motion_video_meta, show_progress=self.show_progress
+            )
+        else:
+            # メタデータの取得はヘッダを読むだけなので、キャッシュがあってもFPSの計算に使う
+            cache_path = MotionMaskCacheService.get_cache_path(
+                self.input_movie_path, self.config.fps_sample
+            )
+            cached_mask = MotionMaskCacheService.load(cache_path)
+            if cached_mask is not None:
+                logger.info(f"キャッシュを使用: {cache_path}")
+                motion_video_meta.video_capture.release()
+                self.active_mask = cached_mask
+            else:
+                self.active_mask = FrameDiffService.extract_mask(
+                    motion_video_meta, show_progress=self.show_progress
+                )
+                MotionMaskCacheService.save(cache_path, self.active_mask)
+
+        # self.active_mask = np.logical_or(self.hand_mask, self.active_mask)
+
+        # 長さは区間を動画内に収めるためだけに使うので、ヘッダのフレーム数から求める
+        if motion_video_meta.orig_fps > 0:
+            self.duration = motion_video_meta.total_frames / motion_video_meta.orig_fps
+        else:
+            self.duration = len(self.active_mask) / motion_video_meta.effective_fps
+
+    def _make_segment(self, mask: np.ndarray) -> None:
         segments = SegmentService.create_segments_from_mask(
             mask=mask,
             fps=self.video_meta.effective_fps,
@@ -83,43 +116,20 @@ class EditMovie:
             segments, self.duration
         )
 
-    def _concat_movie(self) -> None:
-        clips = []
-        for segment in self.segments:
-            start = max(0.0, min(segment.start, self.source_clip.duration))
-            end = max(0.0, min(segment.end, self.source_clip.duration))
-            if end > start:
-                clips.append(self.source_clip.subclipped(start, end))
-
-        self.output_movie = concatenate_videoclips(clips, method="chain")
-
     def _output(self) -> None:
-        self.output_movie.write_videofile(
+        VideoConcatService.concat_segments(
+            self.input_movie_path,
+            self.segments,
             self.output_movie_path,
-            codec="libx264",
-            audio=False,
-        )
-
-    def _clean(self) -> None:
-        self.output_movie.close()
-        if hasattr(self, "source_clip"):
-            self.source_clip.close()
-
-    def _change_speed(self) -> None:
-        self.output_movie = self.output_movie.with_effects(
-            [vfx.MultiplySpeed(self.config.movie_speed)]
+            fps=self.video_meta.orig_fps,
+            speed=self.config.movie_speed,
         )
 
     def run(self) -> None:
 
-        self._setup()
         self._detect_active()
         self._make_segment(self.active_mask)
         if not self.segments:
             logger.info("対象物が検出されませんでした。終了します。")
             return
-        self._concat_movie()
-        if self.config.movie_speed != 1:
-            self._change_speed()
         self._output()
-        self._clean()
@@ -1,16 +1,37 @@
 import logging
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
+from typing import List, Optional
 
 from src.edit_movie import EditMovie
 
 logger = logging.getLogger(__name__)
 
 
-def _run_edit_movie(input_movie_path: str) -> None:
-    edit_movie = EditMovie(input_movie_path)
+def _run_edit_movie(
+    input_movie_path: str,
+    decoder_threads: Optional[int] = None,
+    show_progress: bool = True,
+) -> None:
+    edit_movie = EditMovie(
+        input_movie_path,
+        decoder_threads=decoder_threads,
+        show_progress=show_progress,
+    )
     edit_movie.run()
 
 
+def _run_edit_movie_in_worker(
+    idx: int, total: int, input_movie_path: str, decoder_threads: int
+) -> None:
+    logger.info(f"[{idx}/{total}]exe:  {input_movie_path}")
+    # 複数プロセスの進捗バーが同じ端末で上書きし合うため、ワーカーでは表示しない
+    _run_edit_movie(
+        input_movie_path, decoder_threads=decoder_threads, show_progress=False
+    )
+
+
 def edit_movie_controller(target_path: str) -> None:
     path = Path(target_path)
 
@@ -23,19 +44,55 @@ def edit_movie_controller(target_path: str) -> None:
 
     elif path.is_dir():
         video_extensions = {".mp4", ".avi", ".mov", ".mkv", ".flv", ".wmv"}
-        video_files = [
-            f
-            for f in path.iterdir()
-            if f.is_file() and f.suffix.lower() in video_extensions
-        ]
+        video_files: List[str] = []
+        # scandir の DirEntry はファイル種別をキャッシュしているため、エントリごとの stat が不要
+        with os.scandir(path) as entries:
+            for entry in entries:
+                if (
+                    entry.is_file()
+                    and Path(entry.name).suffix.lower() in video_extensions
+                ):
+                    video_files.append(entry.path)
+                else:
+                    logger.debug(f"skip: {entry.path}")
+        # 実行順を毎回同じにする
+        video_files.sort()
 
         if not video_files:
             logger.warning(f"target path is invalid: {target_path}")
             return
 
-        for idx, video_file in enumerate(video_files, start=1):
-            logger.info(f"[{idx}/{len(video_files)}]exe:  {video_file}")
-            _run_edit_movie(str(video_file))
+        # 1ファイルの処理内でも ffmpeg がスレッドを使うため、コア数の半分に抑える
+        max_workers = max(1, (os.cpu_count() or 1) // 2)
+        # 各プロセスのデコーダが全コア分のスレッドを立てると奪い合いになるため、残りのコアを分け合う
+        decoder_threads = max(1, (os.cpu_count() or 1) // max_workers)
+        failed_files: List[str] = []
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            futures = {
+                executor.submit(
+                    _run_edit_movie_in_worker,
+                    idx,
+                    len(video_files),
+                    video_file,
+                    decoder_threads,
+                ): video_file
+                for idx, video_file in enumerate(video_files, start=1)
+            }
+            for future in as_completed(futures):
+                video_file = futures[future]
+                try:
+                    future.result()
+                except Exception:
+                    # 1ファイルの失敗で残りのファイルの処理を止めない
+                    logger.exception(f"failed:  {video_file}")
+                    failed_files.append(video_file)
+                else:
+                    logger.info(f"done:  {video_file}")
+
+        if failed_files:
+            raise RuntimeError(
+                f"{len(failed_files)}/{len(video_files)} files failed: {failed_files}"
+            )
         logger.info("complete")
     else:
         raise ValueError(f"target_path is invalid: {target_path}")
@@ -3,7 +3,9 @@ from src.service.detector.hand_detector_service import HandDetectorService
 from src.service.detector.landmark_detector_service import LandmarkDetectorService
 from src.service.frame_diff_service import FrameDiffService
 from src.service.frame_extract_service import FrameExtractService
+from src.service.motion_mask_cache_service import MotionMaskCacheService
 from src.service.segment_service import SegmentService
+from src.service.video_concat_service import VideoConcatService
 from src.service.video_service import VideoService
 
 __all__ = [
@@ -12,6 +14,8 @@ __all__ = [
     "FrameExtractService",
     "HandDetectorService",
     "LandmarkDetectorService",
+    "MotionMaskCacheService",
     "SegmentService",
+    "VideoConcatService",
     "VideoService",
 ]
@@ -1,9 +1,7 @@
-import math
 from typing import Any, Callable, List, Union
 
-from tqdm import tqdm
-
 from src.model import BoundingBox, BoundingBoxes, VideoMetaData
+from src.service.video_service import VideoService
 
 
 class BoundingBoxesService:
@@ -23,38 +21,9 @@ class BoundingBoxesService:
         Returns:
             バウンディングボックスのリスト
         """
-        bounding_boxes: BoundingBoxes = []
-
-        try:
-            idx = 0
-            pbar = tqdm(
-                total=math.ceil(video_meta.total_frames / video_meta.sampling_step),
-                desc="detecting...",
-                unit="f",
+        return [
+            frame_processor(frame)
+            for frame in VideoService.iter_sampled_frames(
+                video_meta, desc="detecting..."
             )
-
-            while True:
-                # grab() はデコードせずにフレームポインタを進めるだけなので、
-                # スキップフレームのデコードコストをゼロにできる
-                if not video_meta.video_capture.grab():
-                    break
-
-                if idx % video_meta.sampling_step != 0:
-                    idx += 1
-                    continue
-
-                ret, frame = video_meta.video_capture.retrieve()
-                if not ret:
-                    break
-
-                bounding_box = frame_processor(frame)
-                bounding_boxes.append(bounding_box)
-
-                pbar.update(1)
-                idx += 1
-
-            pbar.close()
-        finally:
-            video_meta.video_capture.release()
-
-        return bounding_boxes
+        ]
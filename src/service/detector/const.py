@@ -2,3 +2,5 @@ MIN_CONFIDENCE = 0.5
 MIN_TARGET_AREA = 0.05
 # MediaPipe に渡す前にリサイズする上限幅。正規化座標を返すため BB の精度には影響しない
 MAX_DETECT_WIDTH = 320
+# MediaPipe の推論を GPU で行う。GPU デリゲートが使えない環境では CPU にフォールバックする
+USE_GPU_DELEGATE = False
@@ -1,16 +1,24 @@
+import logging
 import os
 from typing import Any, List, Optional
 
 import cv2
 import mediapipe as mp
+import numpy as np
 from mediapipe.tasks import python as mp_python
 from mediapipe.tasks.python import vision as mp_vision
 
 from src.model import BoundingBox, Config, VideoMetaData
 from src.service.bounding_box_service import BoundingBoxService
-from src.service.detector.const import MAX_DETECT_WIDTH, MIN_CONFIDENCE
+from src.service.detector.const import (
+    MAX_DETECT_WIDTH,
+    MIN_CONFIDENCE,
+    USE_GPU_DELEGATE,
+)
 from src.service.detector.landmark_detector_service import LandmarkDetectorService
 
+logger = logging.getLogger(__name__)
+
 _MODEL_PATH = os.path.abspath(
     os.path.join(os.path.dirname(__file__), "../../../models/hand_landmarker.task")
 )
@@ -18,13 +26,42 @@ _MODEL_PATH = os.path.abspath(
 
 class HandDetectorService(LandmarkDetectorService):
 
+    frame_index: int
+    resize_buffer: Optional[np.ndarray]
+    rgb_buffer: np.ndarray
+
     def __init__(self, config: Config, video_meta: VideoMetaData):
         super().__init__(config, video_meta)
 
+        # 検出サイズは動画内で変わらないため、縮小先と色変換先のバッファを使い回す
+        # mp.Image は生成時にデータをコピーするので、次のフレームで上書きしても問題ない
+        width, height = video_meta.width, video_meta.height
+        if width > MAX_DETECT_WIDTH:
+            height = int(height * MAX_DETECT_WIDTH / width)
+            width = MAX_DETECT_WIDTH
+            self.resize_buffer = np.empty((height, width, 3), dtype=np.uint8)
+        else:
+            self.resize_buffer = None
+        self.rgb_buffer = np.empty((height, width, 3), dtype=np.uint8)
+
     def _create_detector(self) -> Any:
-        base_options = mp_python.BaseOptions(model_asset_path=_MODEL_PATH)
+        self.frame_index = 0
+        if USE_GPU_DELEGATE:
+            try:
+                return self._create_landmarker(mp_python.BaseOptions.Delegate.GPU)
+            except RuntimeError as e:
+                logger.warning(f"GPU delegate is unavailable, fallback to CPU: {e}")
+        return self._create_landmarker(mp_python.BaseOptions.Delegate.CPU)
+
+    def _create_landmarker(self, delegate: Any) -> Any:
+        base_options = mp_python.BaseOptions(
+            model_asset_path=_MODEL_PATH, delegate=delegate
+        )
+        # VIDEO モードでは前フレームのランドマークから手を追跡するため、
+        # 手のひら検出は追跡が外れたフレームでしか走らない
         options = mp_vision.HandLandmarkerOptions(
             base_options=base_options,
+            running_mode=mp_vision.RunningMode.VIDEO,
             num_hands=1,
             min_hand_detection_confidence=MIN_CONFIDENCE,
             min_hand_presence_confidence=MIN_CONFIDENCE,
@@ -33,12 +70,14 @@ class HandDetectorService(LandmarkDetectorService):
         return mp_vision.HandLandmarker.create_from_options(options)
 
     def _make_bounding_box(self, frame: Any) -> Optional[List[BoundingBox]]:
-        h, w = frame.shape[:2]
-        if w > MAX_DETECT_WIDTH:
-            frame = cv2.resize(frame, (MAX_DETECT_WIDTH, int(h * MAX_DETECT_WIDTH / w)))
-        rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        if self.resize_buffer is not None:
+            height, width = self.resize_buffer.shape[:2]
+            frame = cv2.resize(frame, (width, height), dst=self.resize_buffer)
+        rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, dst=self.rgb_buffer)
         mp_image = mp.Image(image_format=mp.ImageFormat.SRGB, data=rgb)
-        result = self.detector.detect(mp_image)
+        timestamp_ms = int(self.frame_index * 1000 / self.video_meta.effective_fps)
+        self.frame_index += 1
+        result = self.detector.detect_for_video(mp_image, timestamp_ms)
 
         if result.hand_landmarks:
             return [
@@ -1,5 +1,5 @@
 import logging
-from typing import Any, List, Optional
+from typing import Any, List, Optional, Tuple
 
 import cv2
 import numpy as np
@@ -40,7 +40,20 @@ class HeadDetectorService:
         self.video_meta = video_meta
         self.frame_count = 0
 
-    def _is_semicircle_shape(self, contour: np.ndarray) -> bool:
+        # 画面下部の領域サイズは動画内で変わらないため、毎フレームの計算を避けて先に求めておく
+        # メタデータにサイズがない場合は、最初のフレームのサイズから求める
+        self._set_region_size(video_meta.height, video_meta.width)
+        # 暗い色の定義: HSV の V（明度）が低い
+        # V は max(B, G, R) なので、V <= DARK_THRESHOLD は BGR の全チャンネルが閾値以下と同じ
+        self.lower_dark = np.array([0, 0, 0])
+        self.upper_dark = np.array([DARK_THRESHOLD, DARK_THRESHOLD, DARK_THRESHOLD])
+
+    def _set_region_size(self, height: int, width: int) -> None:
+        self.bottom_region_start = int(height * (1.0 - BOTTOM_REGION_RATIO))
+        self.total_pixels = (height - self.bottom_region_start) * width
+        self.min_contour_area = self.total_pixels * 0.05  # 領域の5%未満は除外
+
+    def _is_semicircle_shape(self, contour: np.ndarray, area: float) -> bool:
         """
         輪郭が「上下平ら、左右丸い」形状かどうかを判定する。
 
@@ -49,11 +62,11 @@ class HeadDetectorService:
 
         Args:
             contour: OpenCVの輪郭データ
+            area: 輪郭の面積（輪郭の抽出時に計算済みのもの）
 
         Returns:
             該当する形状ならTrue
         """
-        area = cv2.contourArea(contour)
         perimeter = cv2.arcLength(contour, True)
         if perimeter == 0:
             return False
@@ -62,18 +75,28 @@ class HeadDetectorService:
         circularity = 4 * np.pi * area / (perimeter * perimeter)
 
         # バウンディングボックスを取得してアスペクト比を計算
-        x, _, w, h = cv2.boundingRect(contour)
+        x, y, w, h = cv2.boundingRect(contour)
         if h == 0:
             return False
         aspect_ratio = w / h
 
+        # 横長でない・円形度が範囲外の輪郭が大半なので、点の解析の前に弾く
+        is_horizontal = aspect_ratio >= MIN_ASPECT_RATIO  # 横長
+        is_valid_aspect = aspect_ratio <= MAX_ASPECT_RATIO
+        is_valid_circularity = MIN_CIRCULARITY <= circularity <= MAX_CIRCULARITY
+        if not (is_horizontal and is_valid_aspect and is_valid_circularity):
+            return False
+
         # 輪郭の点を取得して形状を詳細に解析
+        # 各領域で使うのは片方の座標だけなので、列ごとに取り出して絞り込む
         points = contour.reshape(-1, 2)
+        x_coords = points[:, 0]
+        y_coords = points[:, 1]
 
         # 上下の平坦性を確認
         # 輪郭の上端10%と下端10%のY座標のばらつきを確認
-        y_coords = points[:, 1]
-        y_min, y_max = y_coords.min(), y_coords.max()
+        # 輪郭の点は整数座標なので、Y座標の最小・最大は外接矩形から求まる
+        y_min, y_max = y, y + h - 1
         y_range = y_max - y_min
 
         if y_range == 0:
@@ -81,29 +104,28 @@ class HeadDetectorService:
 
         # 上端10%の領域
         top_threshold = y_min + y_range * 0.1
-        top_points = points[y_coords <= top_threshold]
+        top_y_coords = y_coords[y_coords <= top_threshold]
         top_flatness = 0.0
-        if len(top_points) > 1:
-            top_y_std = np.std(top_points[:, 1])
+        if len(top_y_coords) > 1:
+            top_y_std = np.std(top_y_coords)
             top_flatness = top_y_std / y_range  # 正規化
 
         # 下端10%の領域
         bottom_threshold = y_max - y_range * 0.1
-        bottom_points = points[y_coords >= bottom_threshold]
+        bottom_y_coords = y_coords[y_coords >= bottom_threshold]
         bottom_flatness = 0.0
-        if len(bottom_points) > 1:
-            bottom_y_std = np.std(bottom_points[:, 1])
+        if len(bottom_y_coords) > 1:
+            bottom_y_std = np.std(bottom_y_coords)
             bottom_flatness = bottom_y_std / y_range  # 正規化
 
         # 左右の丸みを確認（片方だけでもOK）
         # 中央部（上下40%-60%）での左または右への膨らみを確認
         mid_y_min = y_min + y_range * 0.4
         mid_y_max = y_min + y_range * 0.6
-        mid_points = points[(y_coords >= mid_y_min) & (y_coords <= mid_y_max)]
+        x_coords_mid = x_coords[(y_coords >= mid_y_min) & (y_coords <= mid_y_max)]
 
         has_side_bulge = False
-        if len(mid_points) > 0:
-            x_coords_mid = mid_points[:, 0]
+        if len(x_coords_mid) > 0:
             x_min_mid, x_max_mid = x_coords_mid.min(), x_coords_mid.max()
 
             # 左側の膨らみ：左端から中央部までの広がり
@@ -120,20 +142,10 @@ class HeadDetectorService:
                 has_side_bulge = True
 
         # 判定基準
-        is_horizontal = aspect_ratio >= MIN_ASPECT_RATIO  # 横長
         is_top_flat = top_flatness < 0.15  # 上部が平ら（ばらつきが小さい）
         is_bottom_flat = bottom_flatness < 0.15  # 下部が平ら
-        is_valid_circularity = MIN_CIRCULARITY <= circularity <= MAX_CIRCULARITY
-        is_valid_aspect = aspect_ratio <= MAX_ASPECT_RATIO
 
-        return (
-            is_horizontal
-            and is_top_flat
-            and is_bottom_flat
-            and has_side_bulge
-            and is_valid_circularity
-            and is_valid_aspect
-        )
+        return is_top_flat and is_bottom_flat and has_side_bulge
 
     def _make_bounding_box(self, result: Any) -> Optional[BoundingBox]:
         """
@@ -149,64 +161,49 @@ class HeadDetectorService:
             頭部のバウンディングボックスのリスト、または検出されなかった場合はNone
         """
         frame = result
-        height, width = frame.shape[:2]
+        if self.total_pixels == 0:
+            self._set_region_size(*frame.shape[:2])
 
         # 画面下部の領域を取得
-        bottom_region_start = int(height * (1.0 - BOTTOM_REGION_RATIO))
-        bottom_region = frame[bottom_region_start:, :]
-
-        # HSV色空間に変換
-        hsv = cv2.cvtColor(bottom_region, cv2.COLOR_BGR2HSV)
-
-        # 暗い色（黒）を検出
-        # H: 0-180（色相）, S: 0-255（彩度）, V: 0-255（明度）
-        # 暗い色の定義: V（明度）が低い
-        lower_dark = np.array([0, 0, 0])
-        upper_dark = np.array([180, 255, DARK_THRESHOLD])
+        bottom_region = frame[self.bottom_region_start :, :]
 
-        mask = cv2.inRange(hsv, lower_dark, upper_dark)
+        # 暗い色（黒）を検出。HSV に変換せず BGR のまま判定する
+        mask = cv2.inRange(bottom_region, self.lower_dark, self.upper_dark)
 
         # 暗いピクセルの割合を計算
-        total_pixels = bottom_region.shape[0] * bottom_region.shape[1]
-        dark_pixels = np.sum(mask > 0)
-        dark_ratio = dark_pixels / total_pixels
+        dark_pixels = cv2.countNonZero(mask)
+        dark_ratio = dark_pixels / self.total_pixels
 
         # デバッグログ（最初の10フレームのみ）
-        if self.frame_count < 10:
-            logger.info(
+        is_debug_frame = self.frame_count < 10 and logger.isEnabledFor(logging.DEBUG)
+        if is_debug_frame:
+            logger.debug(
                 f"Frame {self.frame_count}: dark_ratio={dark_ratio:.3f}, "
-                f"dark_pixels={dark_pixels}, total_pixels={total_pixels}"
+                f"dark_pixels={dark_pixels}, total_pixels={self.total_pixels}"
             )
 
         # 閾値以上なら形状チェックを実行
         if dark_ratio >= DARK_RATIO_THRESHOLD:
-            # 輪郭を検出
-            contours, _ = cv2.findContours(
-                mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE
-            )
+            # 輪郭を検出（小さすぎる輪郭は除外済み）
+            contours = self._find_large_contours(mask)
 
-            if self.frame_count < 10:
-                logger.info(f"  Found {len(contours)} contours")
+            if is_debug_frame:
+                logger.debug(f"  Found {len(contours)} large contours")
 
             # 各輪郭の形状をチェック
-            valid_contours = []
-            for contour in contours:
-                # 小さすぎる輪郭は除外
-                area = cv2.contourArea(contour)
-                if area < total_pixels * 0.05:  # 領域の5%未満は除外
-                    continue
-
-                # 半円形状かチェック
-                if self._is_semicircle_shape(contour):
-                    valid_contours.append(contour)
+            # 頭である可能性が高い大きい輪郭から調べ、半円形状が1つ見つかった時点で打ち切る
+            contours.sort(key=lambda contour_area: contour_area[1], reverse=True)
+            has_semicircle = any(
+                self._is_semicircle_shape(contour, area) for contour, area in contours
+            )
 
-            if self.frame_count < 10:
-                logger.info(f"  Valid semicircle contours: {len(valid_contours)}")
+            if is_debug_frame:
+                logger.debug(f"  Has semicircle contour: {has_semicircle}")
 
             self.frame_count += 1
 
             # 半円形状の輪郭が見つかった場合のみ頭と判定
-            if valid_contours:
+            if has_semicircle:
                 # 頭が映っている場合、下部領域全体をバウンディングボックスとして返す
                 x_min = 0.0
                 y_min = 1.0 - BOTTOM_REGION_RATIO
@@ -235,6 +232,52 @@ class HeadDetectorService:
 
         return None
 
+    def _find_large_contours(self, mask: np.ndarray) -> List[Tuple[np.ndarray, float]]:
+        """
+        面積が min_contour_area 以上の外側の輪郭を返す。
+
+        マスク全体に findContours をかけるとノイズの点ごとに輪郭が作られて重いため、
+        連結成分の外接矩形の面積で先に候補を絞り、残った成分だけ輪郭を求める。
+        輪郭の面積は外接矩形の面積を超えないので、絞り込みで必要な輪郭は落ちない。
+
+        Args:
+            mask: 暗いピクセルのマスク
+
+        Returns:
+            cv2.findContours(mask, RETR_EXTERNAL) のうち面積が閾値以上のものと、その面積
+        """
+        _, labels, stats, _ = cv2.connectedComponentsWithStats(mask, connectivity=8)
+        bbox_areas = stats[1:, cv2.CC_STAT_WIDTH] * stats[1:, cv2.CC_STAT_HEIGHT]
+
+        contours = []
+        for label in np.flatnonzero(bbox_areas >= self.min_contour_area) + 1:
+            x, y, w, h = stats[label, :4]
+            component = (labels[y : y + h, x : x + w] == label).astype(np.uint8)
+            (contour,), _ = cv2.findContours(
+                component,
+                cv2.RETR_EXTERNAL,
+                cv2.CHAIN_APPROX_SIMPLE,
+                offset=(int(x), int(y)),
+            )
+            area = cv2.contourArea(contour)
+            if area >= self.min_contour_area:
+                contours.append((contour, area))
+
+        # 他の成分の穴の中にある成分は RETR_EXTERNAL では輪郭にならないため除く。
+        # 囲んでいる成分の輪郭の方が面積が大きいので、比較対象は残った輪郭だけでよい
+        return [
+            (contour, area)
+            for i, (contour, area) in enumerate(contours)
+            if not any(
+                i != j
+                and cv2.pointPolygonTest(
+                    other, (float(contour[0, 0, 0]), float(contour[0, 0, 1])), False
+                )
+                > 0
+                for j, (other, _) in enumerate(contours)
+            )
+        ]
+
     def _is_valid_detection(self, bounding_box: BoundingBox) -> bool:
         if bounding_box.area < MIN_TARGET_AREA:
             return False
@@ -245,9 +288,13 @@ class HeadDetectorService:
 
         return is_in_horizontal_range
 
-    def extract_head_mask(self) -> List[bool]:
+    def extract_head_mask(self) -> np.ndarray:
         self.bounding_boxes = BoundingBoxesService.make_bounding_boxes(
             self.video_meta,
             self._make_bounding_box,
         )
-        return [bool(bounding_box) for bounding_box in self.bounding_boxes]
+        return np.fromiter(
+            (bounding_box is not None for bounding_box in self.bounding_boxes),
+            dtype=bool,
+            count=len(self.bounding_boxes),
+        )
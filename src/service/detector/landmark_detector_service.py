@@ -1,6 +1,8 @@
 import abc
 from typing import Any, List, Optional
 
+import numpy as np
+
 from src.model import BoundingBox, Config, VideoMetaData
 from src.model.service_abstract.landmark_detector_abstract import (
     LandmarkDetectorAbstract,
@@ -15,12 +17,18 @@ class LandmarkDetectorService(LandmarkDetectorAbstract):
     fps_sample: int
     center_position_x: float
     center_detection_ratio: float
+    min_center_x: float
+    max_center_x: float
 
     def __init__(self, config: Config, video_meta: VideoMetaData) -> None:
         self.center_position_x = config.center_postion_x
         self.center_detection_ratio = config.center_detection_ratio
         self.video_meta = video_meta
 
+        # 判定範囲は設定で決まるため、検出ごとに計算しない
+        self.min_center_x = self.center_position_x - self.center_detection_ratio
+        self.max_center_x = self.center_position_x + self.center_detection_ratio
+
     def _make_bounding_boxes(self) -> None:
         self.detector = self._create_detector()
         with self.detector:
@@ -50,11 +58,7 @@ class LandmarkDetectorService(LandmarkDetectorAbstract):
             return False
 
         # X座標の中央位置チェック
-        min_pos = self.center_position_x - self.center_detection_ratio
-        max_pos = self.center_position_x + self.center_detection_ratio
-        is_in_horizontal_range = min_pos <= bounding_box.center_x <= max_pos
-
-        return is_in_horizontal_range
+        return self.min_center_x <= bounding_box.center_x <= self.max_center_x
 
     def _select_best_detection(
         self, bounding_boxes: List[BoundingBox]
@@ -70,30 +74,24 @@ class LandmarkDetectorService(LandmarkDetectorAbstract):
         Returns:
             選択されたバウンディングボックス、または有効な検出がない場合はNone
         """
-        best_detection = None
-        best_key = -float("inf")
+        # 有効な検出のみを候補とする
+        return max(
+            (bb for bb in bounding_boxes if self._is_valid_detection(bb)),
+            key=self._get_selection_key,
+            default=None,
+        )
 
-        for bounding_box in bounding_boxes:
-            # 有効な検出のみを候補とする
-            if self._is_valid_detection(bounding_box):
-                key = self._get_selection_key(bounding_box)
-                if key > best_key:
-                    best_key = key
-                    best_detection = bounding_box
-
-        return best_detection
-
-    def extract_mask(self) -> List[bool]:
+    def extract_mask(self) -> np.ndarray:
 
         self._make_bounding_boxes()
-        return [
+        return np.fromiter(
             (
-                self._select_best_detection(bb) is not None
-                if isinstance(bb, list)
-                else False
-            )
-            for bb in self.bounding_boxes
-        ]
+                isinstance(bb, list) and self._select_best_detection(bb) is not None
+                for bb in self.bounding_boxes
+            ),
+            dtype=bool,
+            count=len(self.bounding_boxes),
+        )
 
     @abc.abstractmethod
     def _get_selection_key(self, bounding_box: BoundingBox) -> float:
@@ -0,0 +1,70 @@
+import hashlib
+import logging
+import os
+import zipfile
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+import config
+
+logger = logging.getLogger(__name__)
+
+# キャッシュの形式のバージョン。FrameDiffService の判定方法（グレースケール化、
+# 差分の判定、先頭フレームの扱いなど）を変えたら上げて、古い結果を使わないようにする
+CACHE_VERSION = 1
+
+
+class MotionMaskCacheService:
+    """フレーム間差分の検出結果をディスクにキャッシュするサービスクラス"""
+
+    @staticmethod
+    def get_cache_path(input_movie_path: str, sampling_fps: int) -> Path:
+        """
+        入力動画と検出条件に対応するキャッシュファイルのパスを返す。
+
+        動画が上書きされた場合や閾値・CACHE_VERSION を変えた場合は別のキーになるため、
+        古い結果が使われることはない。
+
+        Args:
+            input_movie_path: 入力動画のパス
+            sampling_fps: サンプリングFPS
+        """
+        input_path = Path(input_movie_path).resolve()
+        stat = input_path.stat()
+        key = "\n".join(
+            [
+                str(CACHE_VERSION),
+                str(input_path),
+                str(stat.st_mtime_ns),
+                str(stat.st_size),
+                str(sampling_fps),
+                str(config.PIXEL_DIFF_THRESHOLD),
+                str(config.CHANGED_RATIO_THRESHOLD),
+            ]
+        )
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).hexdigest()
+        return input_path.parent / "output" / "cache" / f"{digest}.npz"
+
+    @staticmethod
+    def load(cache_path: Path) -> Optional[np.ndarray]:
+        """キャッシュがあれば動きフレームのマスクを返す。なければ None"""
+        if not cache_path.exists():
+            return None
+        try:
+            with np.load(cache_path) as data:
+                return data["mask"].astype(bool)
+        except (OSError, ValueError, KeyError, zipfile.BadZipFile) as e:
+            # 壊れたキャッシュは無視して検出し直す
+            logger.warning(f"ignore broken cache: {cache_path} ({e})")
+            return None
+
+    @staticmethod
+    def save(cache_path: Path, mask: np.ndarray) -> None:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        # 書き込み途中で中断されても壊れたファイルが残らないよう、書き終えてから置き換える
+        tmp_path = cache_path.with_name(f"{cache_path.name}.{os.getpid()}.tmp")
+        with open(tmp_path, "wb") as f:
+            np.savez(f, mask=mask)
+        os.replace(tmp_path, cache_path)
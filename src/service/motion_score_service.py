@@ -1,6 +1,7 @@
-import math
 from typing import List, Optional
 
+import numpy as np
+
 from src.model import BoundingBox, Segment
 
 
@@ -8,19 +9,26 @@ class MotionScoreService:
 
     @staticmethod
     def apply_motion_filter(
-        mask: List[bool],
+        mask: np.ndarray,
         bounding_boxes: List[Optional[BoundingBox]],
         threshold: float,
-    ) -> List[bool]:
+    ) -> np.ndarray:
         """静止フレームを除外する（基準2）
 
         隣接フレーム間のBoundingBox中心座標の移動量がthreshold未満のフレームをFalseにする。
         """
         frame_motions = MotionScoreService._compute_frame_motions(bounding_boxes)
-        return [
-            mask[i] and bounding_boxes[i] is not None and frame_motions[i] >= threshold
-            for i in range(len(mask))
-        ]
+        is_detected = np.fromiter(
+            (bb is not None for bb in bounding_boxes),
+            dtype=bool,
+            count=len(bounding_boxes),
+        )
+        n = len(mask)
+        return (
+            np.asarray(mask, dtype=bool)
+            & is_detected[:n]
+            & (frame_motions[:n] >= threshold)
+        )
 
     @staticmethod
     def assign_motion_scores_to_segments(
@@ -31,20 +39,22 @@ class MotionScoreService:
         """各セグメントに手の動き量スコアを付与する（基準4の前処理）"""
         n = len(bounding_boxes)
         frame_motions = MotionScoreService._compute_frame_motions(bounding_boxes)
+        # 累積和の差で各セグメントの合計を求め、セグメントごとにフレームを走査しない
+        cumulative_motions = np.concatenate(([0.0], np.cumsum(frame_motions)))
 
-        result = []
-        for segment in segments:
-            start_idx = max(0, min(int(segment.start * effective_fps), n))
-            end_idx = max(0, min(int(segment.end * effective_fps), n))
-            segment_motions = [frame_motions[i] for i in range(start_idx, end_idx)]
-            score = (
-                sum(segment_motions) / len(segment_motions) if segment_motions else 0.0
-            )
-            result.append(
-                Segment(start=segment.start, end=segment.end, motion_score=score)
-            )
+        times = np.array([(s.start, s.end) for s in segments], dtype=np.float64)
+        indices = np.clip((times * effective_fps).astype(np.int64), 0, n).reshape(-1, 2)
+        start_indices, end_indices = indices[:, 0], indices[:, 1]
+        counts = end_indices - start_indices
+        totals = cumulative_motions[end_indices] - cumulative_motions[start_indices]
+        scores = np.divide(
+            totals, counts, out=np.zeros(len(segments)), where=counts > 0
+        )
 
-        return result
+        return [
+            Segment(start=segment.start, end=segment.end, motion_score=score)
+            for segment, score in zip(segments, scores.tolist())
+        ]
 
     @staticmethod
     def select_segments_by_target_duration(
@@ -71,15 +81,18 @@ class MotionScoreService:
     @staticmethod
     def _compute_frame_motions(
         bounding_boxes: List[Optional[BoundingBox]],
-    ) -> List[float]:
+    ) -> np.ndarray:
         """各フレームの移動量（前フレームとの中心座標の距離）を計算"""
-        motions = []
-        for i, bb in enumerate(bounding_boxes):
-            prev = bounding_boxes[i - 1] if i > 0 else None
-            if bb is None or prev is None:
-                motions.append(0.0)
-                continue
-            dx = bb.center_x - prev.center_x
-            dy = bb.center_y - prev.center_y
-            motions.append(math.sqrt(dx * dx + dy * dy))
-        return motions
+        # 未検出フレームを NaN にしておき、前後どちらかが未検出の差分を最後に 0 にする
+        centers = np.array(
+            [
+                (bb.center_x, bb.center_y) if bb is not None else (np.nan, np.nan)
+                for bb in bounding_boxes
+            ],
+            dtype=np.float64,
+        ).reshape(-1, 2)
+
+        motions = np.zeros(len(centers))
+        deltas = np.diff(centers, axis=0)
+        motions[1:] = np.sqrt(deltas[:, 0] * deltas[:, 0] + deltas[:, 1] * deltas[:, 1])
+        return np.nan_to_num(motions, nan=0.0)
@@ -1,4 +1,6 @@
-from typing import List
+from typing import List, Tuple
+
+import numpy as np
 
 import config
 from src.model import Segment
@@ -9,7 +11,7 @@ class SegmentService:
     @classmethod
     def create_segments_from_mask(
         cls,
-        mask: List[bool],
+        mask: np.ndarray,
         fps: float,
     ) -> List[Segment]:
         """True/False マスクから保持セグメント(秒)へ変換し、フィルタリング・結合・パディングを行う
@@ -20,10 +22,13 @@ class SegmentService:
         Returns:
             処理されたセグメントのリスト
         """
-        raw_segments = cls._convert_mask_to_raw_segments(mask, fps)
-        filtered_segments = cls._filter_short_segments(raw_segments)
-        merged_segments = cls._merge_close_segments(filtered_segments)
-        return cls._add_padding(merged_segments)
+        starts, ends = cls._convert_mask_to_raw_segments(mask, fps)
+        starts, ends = cls._filter_short_segments(starts, ends)
+        starts, ends = cls._merge_close_segments(starts, ends)
+        starts, ends = cls._add_padding(starts, ends)
+        return [
+            Segment(start, end) for start, end in zip(starts.tolist(), ends.tolist())
+        ]
 
     @classmethod
     def clamp_segments_to_duration(
@@ -39,77 +44,67 @@ class SegmentService:
             開始/終了時刻が 0.0 ~ duration の範囲内に制限されたセグメントリスト
             終了時刻が開始時刻以下になったセグメントは除外される
         """
-        clamped = []
-        for s in segments:
-            start = max(0.0, min(s.start, duration))
-            end = max(0.0, min(s.end, duration))
-            if end > start:
-                clamped.append(Segment(start, end))
-        return clamped
+        starts = np.clip([s.start for s in segments], 0.0, duration)
+        ends = np.clip([s.end for s in segments], 0.0, duration)
+        is_valid = ends > starts
+        return [
+            Segment(start, end)
+            for start, end in zip(starts[is_valid].tolist(), ends[is_valid].tolist())
+        ]
 
     @staticmethod
-    def _convert_mask_to_raw_segments(mask: List[bool], fps: float) -> List[Segment]:
-        """マスクから生のセグメントリストを抽出（フィルタリングなし）
+    def _convert_mask_to_raw_segments(
+        mask: np.ndarray, fps: float
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """マスクから生のセグメントを抽出（フィルタリングなし）
 
         Args:
             mask: フレームごとのTrue/Falseマスク
             fps: マスクのFPS
 
         Returns:
-            Trueが連続する区間をセグメントに変換したリスト
+            Trueが連続する区間の (開始秒の配列, 終了秒の配列)
         """
-        segments: List[Segment] = []
-        n = len(mask)
-        i = 0
-        while i < n:
-            if not mask[i]:
-                i += 1
-                continue
-            j = i + 1
-            while j < n and mask[j]:
-                j += 1
-            start = i / fps
-            end = j / fps
-            segments.append(Segment(start, end))
-            i = j
-        return segments
+        padded = np.concatenate(([False], np.asarray(mask, dtype=bool), [False]))
+        edges = np.diff(padded.view(np.int8))
+        starts = np.flatnonzero(edges == 1)
+        ends = np.flatnonzero(edges == -1)
+        return starts / fps, ends / fps
 
     @staticmethod
-    def _filter_short_segments(segments: List[Segment]) -> List[Segment]:
-        """segmentsをmin_keep_sec以上の長さを持つもののみにする"""
-        return [s for s in segments if (s.end - s.start) >= config.MIN_KEEP_SEC]
+    def _filter_short_segments(
+        starts: np.ndarray, ends: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """min_keep_sec以上の長さを持つセグメントのみにする"""
+        keep = (ends - starts) >= config.MIN_KEEP_SEC
+        return starts[keep], ends[keep]
 
     @staticmethod
-    def _merge_close_segments(segments: List[Segment]) -> List[Segment]:
+    def _merge_close_segments(
+        starts: np.ndarray, ends: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray]:
         """近接するセグメントを結合
 
+        セグメントは時刻順に並び重ならないので、直前のセグメントとの隙間が
+        merge_gap_sec を超える位置だけが結合後のセグメントの境界になる。
+
         Args:
-            segments: 結合対象のセグメント
+            starts: セグメントの開始秒の配列
+            ends: セグメントの終了秒の配列
 
         Returns:
-            結合されたセグメントのリスト
+            結合されたセグメントの (開始秒の配列, 終了秒の配列)
         """
-        if not segments:
-            return []
-
-        merged: List[Segment] = []
-        current = segments[0]
-
-        for segment in segments[1:]:
-            if (segment.start - current.end) <= config.MERGE_GAP_SEC:
-                # 隙間が小さいので結合
-                current = Segment(current.start, segment.end)
-            else:
-                # 隙間が大きいので現在のセグメントを保存
-                merged.append(current)
-                current = segment
+        if starts.size == 0:
+            return starts, ends
 
-        merged.append(current)
-        return merged
+        is_separated = (starts[1:] - ends[:-1]) > config.MERGE_GAP_SEC
+        first_indices = np.concatenate(([0], np.flatnonzero(is_separated) + 1))
+        last_indices = np.concatenate((first_indices[1:] - 1, [starts.size - 1]))
+        return starts[first_indices], ends[last_indices]
 
     @staticmethod
-    def _add_padding(segments: List[Segment]) -> List[Segment]:
-        return [
-            Segment(max(0.0, s.start - config.PAD_SEC), s.end + config.PAD_SEC)
-            for s in segments
-        ]
+    def _add_padding(
+        starts: np.ndarray, ends: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        return np.maximum(starts - config.PAD_SEC, 0.0), ends + config.PAD_SEC
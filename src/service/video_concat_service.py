@@ -0,0 +1,138 @@
+import math
+import subprocess
+import tempfile
+from pathlib import Path
+from typing import List
+
+from moviepy.config import FFMPEG_BINARY
+
+from src.model import Segment
+
+# 区間ごとのファイルを -c copy で連結するため、全ての区間で同じ設定でエンコードする
+ENCODE_ARGS = ["-c:v", "libx264", "-pix_fmt", "yuv420p"]
+
+
+class VideoConcatService:
+    """ffmpeg で動画の区間を切り出して連結するサービスクラス"""
+
+    @classmethod
+    def concat_segments(
+        cls,
+        input_movie_path: str,
+        segments: List[Segment],
+        output_movie_path: str,
+        fps: float,
+        speed: float = 1,
+    ) -> None:
+        """
+        入力動画から segments の区間を切り出し、連結して書き出す。
+
+        区間ごとに入力側の -ss/-t でシークして一時ファイルへ再エンコードし、
+        最後に concat demuxer で再エンコードせずに連結する。同時に開く入力は
+        常に1つなので、区間の数が多くてもメモリ使用量は増えない。
+        再エンコード時の入力側シークはフレーム単位で正確なため、キーフレームの
+        位置に関係なく区間内のフレームだけが出力される。
+        速度変更がある場合は setpts でタイムスタンプを詰め、元のフレームレートで
+        間引いた（遅くする場合は複製した）フレームをエンコードする。
+
+        Args:
+            input_movie_path: 入力動画のパス
+            segments: 切り出す区間のリスト（動画の長さ内に収まっていること）
+            output_movie_path: 出力動画のパス
+            fps: 元動画のFPS。取得できず0以下の場合、速度変更時のフレームの選択は ffmpeg に任せる
+            speed: 再生速度の倍率
+        """
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            part_paths: List[str] = []
+            # 連結後の動画での、区間の先頭フレームの番号
+            frame_offset = 0
+            for i, segment in enumerate(segments):
+                filter_args: List[str] = []
+                if speed != 1 and fps > 0:
+                    # 連結後の動画全体に速度変更をかけた場合と同じフレームを選ぶため、
+                    # 区間をまたいだ通し番号からタイムスタンプを振り、この区間の出力の
+                    # 先頭が0になるようにずらす。出力の枚数も区間の分で区切る。
+                    # fps フィルタは round=up で、各時刻より前の最後のフレームを選ぶ
+                    # （moviepy の MultiplySpeed と同じフレームになる）
+                    start_frame = frame_offset
+                    frame_offset += cls._count_frames(segment, fps)
+                    output_start = cls._ceil(start_frame / speed)
+                    output_frames = cls._ceil(frame_offset / speed) - output_start
+                    if output_frames <= 0:
+                        continue
+                    filter_args = [
+                        "-filter:v",
+                        f"setpts=((N+{start_frame})/{speed}-{output_start})/{fps}/TB,"
+                        f"fps={fps}:round=up",
+                        "-frames:v",
+                        f"{output_frames}",
+                    ]
+                elif speed != 1:
+                    filter_args = ["-filter:v", f"setpts=PTS/{speed}"]
+
+                part_path = str(Path(tmp_dir) / f"part_{i:05d}.mp4")
+                cls._run_ffmpeg(
+                    [
+                        "-ss",
+                        f"{segment.start:.6f}",
+                        "-t",
+                        f"{segment.end - segment.start:.6f}",
+                        "-i",
+                        input_movie_path,
+                        "-map",
+                        "0:v:0",
+                        *filter_args,
+                        *ENCODE_ARGS,
+                        part_path,
+                    ]
+                )
+                part_paths.append(part_path)
+
+            concat_list_path = cls._write_concat_list(tmp_dir, part_paths)
+            cls._run_ffmpeg(
+                [
+                    "-f",
+                    "concat",
+                    "-safe",
+                    "0",
+                    "-i",
+                    concat_list_path,
+                    "-map",
+                    "0:v:0",
+                    "-c",
+                    "copy",
+                    output_movie_path,
+                ]
+            )
+
+    @classmethod
+    def _count_frames(cls, segment: Segment, fps: float) -> int:
+        """区間 [start, end) に含まれる元動画のフレーム数"""
+        return cls._ceil(segment.end * fps) - cls._ceil(segment.start * fps)
+
+    @staticmethod
+    def _ceil(value: float) -> int:
+        # 秒数とFPSの積は整数ちょうどでも誤差で僅かに上にずれるため、ずれの分は切り捨てる
+        return math.ceil(value - 1e-6)
+
+    @staticmethod
+    def _write_concat_list(tmp_dir: str, part_paths: List[str]) -> str:
+        lines = ["ffconcat version 1.0"]
+        for part_path in part_paths:
+            quoted_path = Path(part_path).as_posix().replace("'", "'\\''")
+            lines.append(f"file '{quoted_path}'")
+
+        concat_list_path = str(Path(tmp_dir) / "list.ffconcat")
+        with open(concat_list_path, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+        return concat_list_path
+
+    @staticmethod
+    def _run_ffmpeg(args: List[str]) -> None:
+        result = subprocess.run(
+            [FFMPEG_BINARY, "-y", "-loglevel", "error", *args],
+            capture_output=True,
+        )
+        if result.returncode != 0:
+            stderr = result.stderr.decode("utf-8", errors="replace").strip()
+            raise RuntimeError(f"ffmpeg failed: {stderr}")
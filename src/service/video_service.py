@@ -1,17 +1,35 @@
-from typing import Tuple
+import logging
+import math
+import queue
+import threading
+from typing import Iterator, List, Optional, Tuple
 
 import cv2
+import numpy as np
+from tqdm import tqdm
 
 from src.model import VideoMetaData
 
+logger = logging.getLogger(__name__)
+
+# デコードの先読み枚数。大きくしてもデコードと解析の重なりは増えず、メモリだけが増える
+FRAME_QUEUE_SIZE = 8
+# 進捗バーをまとめて更新するフレーム数
+PROGRESS_UPDATE_INTERVAL = 16
+
 
 class VideoService:
-    """動画の初期化とメタデータ取得を行うサービスクラス"""
+    """動画の初期化とメタデータ取得、フレーム読み込みを行うサービスクラス"""
 
     @classmethod
-    def get_video_meta(cls, input_movie_path: str, sampling_fps: int) -> VideoMetaData:
+    def get_video_meta(
+        cls,
+        input_movie_path: str,
+        sampling_fps: int,
+        decoder_threads: Optional[int] = None,
+    ) -> VideoMetaData:
 
-        video_capture = cv2.VideoCapture(input_movie_path)
+        video_capture = cls._open_capture(input_movie_path, decoder_threads)
         if not video_capture.isOpened():
             raise RuntimeError(f"Could not open video: {input_movie_path}")
         original_fps = video_capture.get(cv2.CAP_PROP_FPS)
@@ -31,6 +49,159 @@ class VideoService:
 
         return metadata
 
+    @staticmethod
+    def _open_capture(
+        input_movie_path: str, decoder_threads: Optional[int]
+    ) -> cv2.VideoCapture:
+        """
+        使える場合はハードウェアデコードで動画を開く。
+
+        VIDEO_ACCELERATION_ANY は利用できるデコーダがなければ OpenCV 側でソフトウェア
+        デコードに切り替わるが、FFMPEG バックエンドで開けない環境に備えて通常の方法でも開き直す。
+        その場合もまずスレッド数を指定して開き、開けなければパラメータなしで開く。
+
+        Args:
+            input_movie_path: 動画のパス
+            decoder_threads: デコーダのスレッド数。None の場合は FFmpeg に任せる
+        """
+        thread_params = []
+        if decoder_threads is not None:
+            thread_params = [cv2.CAP_PROP_N_THREADS, decoder_threads]
+        params = [
+            cv2.CAP_PROP_HW_ACCELERATION,
+            cv2.VIDEO_ACCELERATION_ANY,
+            *thread_params,
+        ]
+        video_capture = cv2.VideoCapture(input_movie_path, cv2.CAP_FFMPEG, params)
+        if video_capture.isOpened():
+            logger.debug(
+                "hw acceleration: "
+                f"{int(video_capture.get(cv2.CAP_PROP_HW_ACCELERATION))}"
+            )
+            return video_capture
+
+        video_capture.release()
+        # 開き直す場合もスレッド数の上限は保つ
+        video_capture = cv2.VideoCapture(input_movie_path, cv2.CAP_ANY, thread_params)
+        if video_capture.isOpened() or not thread_params:
+            return video_capture
+
+        # FFmpeg 以外のバックエンドは未対応のパラメータがあると開けないことがある
+        video_capture.release()
+        return cv2.VideoCapture(input_movie_path)
+
+    @classmethod
+    def iter_sampled_frames(
+        cls, video_meta: VideoMetaData, desc: str, show_progress: bool = True
+    ) -> Iterator[np.ndarray]:
+        """
+        サンプリング対象のフレーム(BGR)を先頭から順に返す。
+
+        デコードは別スレッドで先読みし、呼び出し側の解析処理と並行して進める。
+        読み終わるか途中で打ち切られた時点で video_capture を解放する。
+        フレームのバッファは使い回すため、返したフレームは次のフレームを
+        受け取るまでの間だけ有効。保持する場合はコピーすること。
+
+        Args:
+            video_meta: 動画のメタデータ
+            desc: 進捗バーの表示名
+            show_progress: 進捗バーを表示するか
+        """
+        frame_queue: queue.Queue[Optional[np.ndarray]] = queue.Queue(
+            maxsize=FRAME_QUEUE_SIZE
+        )
+        stop_event = threading.Event()
+        errors: List[BaseException] = []
+        reader = threading.Thread(
+            target=cls._read_sampled_frames,
+            args=(video_meta, frame_queue, stop_event, errors),
+            daemon=True,
+        )
+
+        pbar = tqdm(
+            total=math.ceil(video_meta.total_frames / video_meta.sampling_step),
+            desc=desc,
+            unit="f",
+            disable=not show_progress,
+        )
+        reader.start()
+        # 進捗バーの更新はロックと描画判定を伴うため、まとめて反映する
+        pending_updates = 0
+        try:
+            while True:
+                frame = frame_queue.get()
+                if frame is None:
+                    break
+                yield frame
+                pending_updates += 1
+                if pending_updates >= PROGRESS_UPDATE_INTERVAL:
+                    pbar.update(pending_updates)
+                    pending_updates = 0
+        finally:
+            stop_event.set()
+            reader.join()
+            pbar.update(pending_updates)
+            pbar.close()
+            video_meta.video_capture.release()
+
+        if errors:
+            raise errors[0]
+
+    @staticmethod
+    def _read_sampled_frames(
+        video_meta: VideoMetaData,
+        frame_queue: "queue.Queue[Optional[np.ndarray]]",
+        stop_event: threading.Event,
+        errors: List[BaseException],
+    ) -> None:
+        def put(item: Optional[np.ndarray]) -> bool:
+            # 呼び出し側が途中で抜けた場合に put で待ち続けないようにする
+            while not stop_event.is_set():
+                try:
+                    frame_queue.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        # キュー内のフレーム・呼び出し側で処理中のフレーム・デコード中のフレームが
+        # 同じバッファを指さない枚数で retrieve 先を使い回し、フレームごとの確保をなくす
+        frame_buffers: List[Optional[np.ndarray]] = [None] * (FRAME_QUEUE_SIZE + 2)
+
+        # ループ内で毎フレーム参照するため、属性の参照をループの外で済ませておく
+        grab = video_meta.video_capture.grab
+        retrieve = video_meta.video_capture.retrieve
+        sampling_step = video_meta.sampling_step
+        buffer_count = len(frame_buffers)
+
+        try:
+            idx = 0
+            next_sample_idx = 0
+            slot = 0
+            while True:
+                # grab() はデコードせずにフレームポインタを進めるだけなので、
+                # スキップフレームのデコードコストをゼロにできる
+                if not grab():
+                    break
+
+                if idx != next_sample_idx:
+                    idx += 1
+                    continue
+                next_sample_idx += sampling_step
+
+                ret, frame = retrieve(frame_buffers[slot])
+                if not ret or not put(frame):
+                    break
+                frame_buffers[slot] = frame
+                slot += 1
+                if slot == buffer_count:
+                    slot = 0
+                idx += 1
+        except BaseException as e:
+            errors.append(e)
+        finally:
+            put(None)
+
     @staticmethod
     def _get_effective_fps(original_fps: float, sampling_fps: int) -> Tuple[int, float]:
         """